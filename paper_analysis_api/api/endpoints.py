@@ -3,16 +3,21 @@ API endpoints for Paper Analysis
 Handles HTTP requests and orchestrates services
 """
 
+import asyncio
 import os
+import secrets
+from concurrent.futures import Executor
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import JSONResponse, FileResponse
-from typing import Optional
-import uuid
+import aiofiles
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncIterator, List, Tuple
 
+from ..models.domain import PageData
 from ..models.schemas import AnalysisRequest, AnalysisResponse, ErrorResponse
 from ..services import PDFExtractionService, GeminiAnalysisService
-from ..config import OUTPUT_BASE_DIR, MAX_PAGES_DEFAULT
+from ..services.pdf_service import count_pages
+from ..config import OUTPUT_BASE_DIR, UPLOAD_TEMP_DIR, MAX_PAGES_DEFAULT
 from ..utils.image_processor import insert_figure_images
 
 router = APIRouter(prefix="/api/v1", tags=["analysis"])
@@ -20,6 +25,12 @@ router = APIRouter(prefix="/api/v1", tags=["analysis"])
 ALLOWED_EXTENSIONS = {".pdf"}
 MAX_FILE_SIZE_MB = 50
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+UPLOAD_CHUNK_SIZE_BYTES = 64 * 1024
+STREAMING_MEDIA_TYPE = "text/markdown; charset=utf-8"
+ANALYSIS_ID_HEADER = "X-Analysis-Id"
+
+# Streamed analyses still being saved; holds the tasks so they aren't garbage collected mid-write
+_pending_saves = set()
 
 
 @router.post(
@@ -27,30 +38,47 @@ MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
     response_model=AnalysisResponse,
     responses={
         400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
     }
 )
 async def analyze_paper(
+    request: Request,
     file: UploadFile = File(..., description="PDF file to analyze"),
     max_pages: int = Query(
         default=None,
         ge=1,
         le=200,
         description="Optional: Maximum pages to analyze (default: all pages)"
+    ),
+    stream: bool = Query(
+        default=False,
+        description="Stream the markdown as it is generated instead of returning JSON"
     )
 ) -> AnalysisResponse:
     """
     Analyze an academic paper PDF
 
-    Extracts pages and text, then analyzes with Gemini in multi-turn fashion
+    Extracts pages and text, then analyzes all pages with Gemini in a single request
     Returns analysis in template.md format with easy-to-understand explanations
+    With stream=true the markdown is sent as it is generated; figure images are
+    embedded only in the saved analysis
     """
     validate_uploaded_file(file)
 
     temp_pdf_path = await save_uploaded_file(file)
 
+    process_pool = request.app.state.process_pool
+
     try:
-        analysis_result, analysis_id = perform_analysis(temp_pdf_path, max_pages)
+        if stream:
+            return await perform_streaming_analysis(temp_pdf_path, max_pages, process_pool)
+
+        analysis_result, analysis_id = await perform_analysis(
+            temp_pdf_path,
+            max_pages,
+            process_pool
+        )
         return create_success_response(analysis_result, analysis_id)
 
     except Exception as e:
@@ -86,7 +114,8 @@ def validate_uploaded_file(file: UploadFile) -> None:
 
 async def save_uploaded_file(file: UploadFile) -> Path:
     """
-    Save uploaded file to temporary location
+    Stream uploaded file to temporary location in fixed-size chunks
+    Memory use stays at one chunk regardless of file size
 
     Returns:
         Path to saved file
@@ -94,52 +123,166 @@ async def save_uploaded_file(file: UploadFile) -> Path:
     Raises:
         HTTPException: If file is too large or save fails
     """
-    os.makedirs(OUTPUT_BASE_DIR, exist_ok=True)
+    os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
 
-    temp_pdf_path = OUTPUT_BASE_DIR / file.filename
+    temp_pdf_path = UPLOAD_TEMP_DIR / file.filename
 
     try:
-        file_content = await file.read()
-
-        if len(file_content) > MAX_FILE_SIZE_BYTES:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Max size: {MAX_FILE_SIZE_MB}MB"
-            )
-
-        with open(temp_pdf_path, "wb") as f:
-            f.write(file_content)
-
+        await stream_upload_to_disk(file, temp_pdf_path)
         return temp_pdf_path
 
     except HTTPException:
+        cleanup_temp_file(temp_pdf_path)
         raise
     except Exception as e:
+        cleanup_temp_file(temp_pdf_path)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to save file: {str(e)}"
         )
 
 
-def perform_analysis(pdf_path: Path, max_pages: int):
+async def stream_upload_to_disk(file: UploadFile, destination: Path) -> None:
+    """
+    Copy upload to disk chunk by chunk without blocking the event loop
+
+    Raises:
+        HTTPException: If file exceeds the maximum size
+    """
+    bytes_written = 0
+
+    async with aiofiles.open(destination, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE_BYTES):
+            bytes_written += len(chunk)
+            if bytes_written > MAX_FILE_SIZE_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Max size: {MAX_FILE_SIZE_MB}MB"
+                )
+            await f.write(chunk)
+
+
+async def perform_analysis(pdf_path: Path, max_pages: int, process_pool: Executor):
     """
     Perform complete paper analysis
 
     Orchestrates PDF extraction and Gemini analysis services
     """
-    # Generate unique ID for this analysis
-    analysis_id = str(uuid.uuid4())[:8]
-    output_dir = create_output_directory(pdf_path, analysis_id)
-
-    pdf_service = PDFExtractionService(output_dir)
-    pages_data = pdf_service.extract_pages(pdf_path, max_pages)
+    analysis_id, output_dir, pages_data = await extract_for_analysis(
+        pdf_path,
+        max_pages,
+        process_pool
+    )
 
     gemini_service = GeminiAnalysisService()
-    analysis_result = gemini_service.analyze_paper(
+    analysis_result = await gemini_service.analyze_paper(
         pages_data,
         pdf_path.name
     )
 
+    enhanced_result = await finalize_analysis(analysis_result, output_dir, analysis_id)
+
+    return enhanced_result, analysis_id
+
+
+async def perform_streaming_analysis(
+    pdf_path: Path,
+    max_pages: int,
+    process_pool: Executor
+) -> StreamingResponse:
+    """
+    Perform paper analysis, streaming the markdown to the client as Gemini generates it
+
+    Extraction and opening the Gemini stream complete before the response starts, so the
+    temporary PDF can be removed and failures still map to an error status
+    The analysis ID is returned in a header so clients can locate the saved images
+    """
+    analysis_id, output_dir, pages_data = await extract_for_analysis(
+        pdf_path,
+        max_pages,
+        process_pool
+    )
+
+    gemini_service = GeminiAnalysisService()
+    chunks = await gemini_service.stream_analysis(pages_data)
+
+    return StreamingResponse(
+        stream_and_save_analysis(
+            gemini_service,
+            chunks,
+            pages_data,
+            pdf_path.name,
+            output_dir,
+            analysis_id
+        ),
+        media_type=STREAMING_MEDIA_TYPE,
+        headers={ANALYSIS_ID_HEADER: analysis_id}
+    )
+
+
+async def stream_and_save_analysis(
+    gemini_service: GeminiAnalysisService,
+    chunks: AsyncIterator[str],
+    pages_data: List[PageData],
+    pdf_filename: str,
+    output_dir: Path,
+    analysis_id: str
+) -> AsyncIterator[str]:
+    """
+    Relay Gemini chunks to the client while accumulating them for the saved analysis
+    Whatever was received is saved even if the client disconnects or the stream fails midway;
+    the save runs in its own shielded task because a disconnect cancels this generator
+    """
+    received_chunks = []
+
+    try:
+        async for chunk in chunks:
+            received_chunks.append(chunk)
+            yield chunk
+    finally:
+        markdown_content = "".join(received_chunks)
+        if markdown_content:
+            analysis_result = gemini_service.create_analysis_result(
+                markdown_content,
+                pdf_filename,
+                len(pages_data)
+            )
+            save_task = asyncio.create_task(finalize_analysis(analysis_result, output_dir, analysis_id))
+            _pending_saves.add(save_task)
+            save_task.add_done_callback(_pending_saves.discard)
+            await asyncio.shield(save_task)
+
+
+async def extract_for_analysis(
+    pdf_path: Path,
+    max_pages: int,
+    process_pool: Executor
+) -> Tuple[str, Path, List[PageData]]:
+    """
+    Create a fresh analysis output directory and extract the PDF pages into it
+    Page blocks are rendered in the process pool; the lightweight orchestration
+    runs in a thread so the event loop stays free
+
+    Returns:
+        Analysis ID, output directory and extracted page data
+    """
+    # Generate unique ID for this analysis
+    analysis_id = secrets.token_hex(4)
+    output_dir = create_output_directory(pdf_path, analysis_id)
+
+    pdf_service = PDFExtractionService(output_dir)
+    pages_data = await asyncio.to_thread(
+        pdf_service.extract_pages,
+        pdf_path,
+        max_pages,
+        process_pool
+    )
+
+    return analysis_id, output_dir, pages_data
+
+
+async def finalize_analysis(analysis_result, output_dir: Path, analysis_id: str):
+    """Insert figure images into the analysis markdown and save it"""
     # Insert figure images into markdown
     markdown_with_images = insert_figure_images(
         analysis_result.markdown_content,
@@ -158,9 +301,9 @@ def perform_analysis(pdf_path: Path, max_pages: int):
         output_path=analysis_result.output_path
     )
 
-    save_analysis_output(enhanced_result, output_dir)
+    await save_analysis_output(enhanced_result, output_dir)
 
-    return enhanced_result, analysis_id
+    return enhanced_result
 
 
 def create_output_directory(pdf_path: Path, analysis_id: str) -> Path:
@@ -170,17 +313,21 @@ def create_output_directory(pdf_path: Path, analysis_id: str) -> Path:
     return output_dir
 
 
-def save_analysis_output(analysis_result, output_dir: Path) -> None:
-    """Save analysis markdown to file"""
+async def save_analysis_output(analysis_result, output_dir: Path) -> None:
+    """Save analysis markdown to file in a single non-blocking write"""
     output_path = output_dir / "ANALYSIS.md"
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(f"# 논문 분석 (Gemini Flash 2.5)\n\n")
-        f.write(f"**PDF**: {analysis_result.pdf_filename}\n")
-        f.write(f"**분석 페이지**: {analysis_result.total_pages} 페이지\n")
-        f.write(f"**생성 시각**: {analysis_result.analysis_timestamp}\n\n")
-        f.write("---\n\n")
-        f.write(analysis_result.markdown_content)
+    content = "".join([
+        "# 논문 분석 (Gemini Flash 2.5)\n\n",
+        f"**PDF**: {analysis_result.pdf_filename}\n",
+        f"**분석 페이지**: {analysis_result.total_pages} 페이지\n",
+        f"**생성 시각**: {analysis_result.analysis_timestamp}\n\n",
+        "---\n\n",
+        analysis_result.markdown_content
+    ])
+
+    async with aiofiles.open(output_path, "w", encoding="utf-8") as f:
+        await f.write(content)
 
 
 def create_success_response(analysis_result, analysis_id: str) -> AnalysisResponse:
@@ -214,15 +361,11 @@ async def get_pdf_info(
     Returns:
         Page count and filename
     """
-    import fitz
-
     validate_uploaded_file(file)
     temp_pdf_path = await save_uploaded_file(file)
 
     try:
-        doc = fitz.open(temp_pdf_path)
-        page_count = len(doc)
-        doc.close()
+        page_count = await asyncio.to_thread(count_pages, temp_pdf_path)
 
         return JSONResponse(content={
             "filename": file.filename,
@@ -236,38 +379,3 @@ async def get_pdf_info(
     finally:
         cleanup_temp_file(temp_pdf_path)
 
-
-@router.get("/images/{analysis_id}/{filename}")
-async def serve_image(analysis_id: str, filename: str):
-    """
-    Serve page images for analysis results
-
-    Args:
-        analysis_id: Unique analysis ID
-        filename: Image filename (e.g., page_1.png)
-
-    Returns:
-        Image file
-    """
-    image_path = OUTPUT_BASE_DIR / analysis_id / filename
-
-    if not image_path.exists():
-        raise HTTPException(
-            status_code=404,
-            detail=f"Image not found: {filename}"
-        )
-
-    # Security: Ensure path is within OUTPUT_BASE_DIR
-    try:
-        image_path.resolve().relative_to(OUTPUT_BASE_DIR.resolve())
-    except ValueError:
-        raise HTTPException(
-            status_code=403,
-            detail="Access denied"
-        )
-
-    return FileResponse(
-        image_path,
-        media_type="image/png",
-        headers={"Cache-Control": "public, max-age=3600"}
-    )
@@ -36,17 +36,43 @@ GEMINI_FALLBACK_MODEL = "gemini-1.5-flash"
 
 # PDF Processing Configuration
 PDF_DPI_SCALE = 300 / 72  # 300 DPI for high-resolution images
+STORE_SHRINK_PERCENT = 100  # Share of MuPDF's resource cache freed after each rendered page
+PNG_COMPRESSION_LEVEL = 1  # zlib level (0-9) for saved page and figure PNGs; favors encode speed
+FIGURE_WRITE_MAX_WORKERS = 4  # Threads encoding and writing figure images concurrently
 MAX_PAGES_DEFAULT = 10
+REFERENCE_SEARCH_MAX_PAGES = 10  # Trailing pages scanned for the reference section heading
+REFERENCE_HEADING_REGION_RATIO = 0.15  # Top fraction of a page read when looking for that heading
 TEXT_TRUNCATE_LENGTH = 3000  # Characters to include per page text
+TEMPLATE_PREVIEW_LENGTH = 2000  # Characters of template.md included in the preamble
+LAYOUT_DETECTION_SCALE = 2  # Page zoom (relative to 72 DPI) fed to the layout detector
+LAYOUT_DETECTION_BATCH_SIZE = 4  # Pages per detector forward pass; bounded by GPU memory
+LAYOUT_DETECTOR_SCORE_THRESHOLD = 0.7  # Minimum detection confidence for a figure crop
+LAYOUT_DETECTOR_PROPOSALS_PER_IMAGE = 100  # RPN proposals kept after NMS at inference
+LAYOUT_DETECTOR_WARMUP_SHAPE = (1024, 1024)  # Height, width of the dummy image run when the model loads
+LAYOUT_DETECTOR_PRECISION = os.getenv("LAYOUT_DETECTOR_PRECISION", "bf16")  # "bf16", "fp16" or "fp32" on CUDA
+PDF_EXTRACTION_MAX_WORKERS = 4  # Upper bound on processes extracting PDFs in parallel
+# Pages per worker task; each task opens its own document and its pages are detected in one forward pass
+PDF_EXTRACTION_BLOCK_SIZE = LAYOUT_DETECTION_BATCH_SIZE
 
 # File Paths
 BASE_DIR = Path(r"C:\Users\gridone\Downloads\추출")
 TEMPLATE_PATH = BASE_DIR / "template.md"
 OUTPUT_BASE_DIR = BASE_DIR / "api_output"
+UPLOAD_TEMP_DIR = BASE_DIR / "api_uploads"  # Kept outside OUTPUT_BASE_DIR, which is served statically
+IMAGE_CACHE_MAX_AGE_SECONDS = 3600
+# Server processes started by main.py; each owns its own process pool, layout model and rate limiter
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
 
 # Gemini API Configuration
-GEMINI_RATE_LIMIT_DELAY = 2  # Seconds between API calls
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "10"))  # Requests per minute quota (10 on free tier)
+GEMINI_RETRY_JITTER_FACTOR = 0.25  # Randomize retry waits by +/-25% to avoid synchronized retries
+GEMINI_RETRY_BASE_BACKOFF_MS = 1000  # First retry wait; doubles on each further attempt
+GEMINI_RETRY_MAX_BACKOFF_MS = 30000  # Cap on a single retry wait
 GEMINI_TIMEOUT = 300  # Seconds for long analysis
+GEMINI_UPLOAD_MAX_WORKERS = 8  # Upper bound on concurrent page image uploads
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = 3600  # Lifetime of the cached instruction preamble
+# Recreate the cache this long before it expires; the handle is looked up right before a generate call, so one call is the worst case
+GEMINI_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = GEMINI_TIMEOUT
 
 # Template Instructions
 TEMPLATE_INSTRUCTIONS = """다음은 학술 논문 PDF입니다.
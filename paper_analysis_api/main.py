@@ -3,15 +3,65 @@ Paper Analysis API - Main Application
 FastAPI application for analyzing academic papers with Gemini
 """
 
+import multiprocessing
+import os
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
 
 from .api import router
+from .config import (
+    PDF_EXTRACTION_MAX_WORKERS,
+    OUTPUT_BASE_DIR,
+    IMAGE_CACHE_MAX_AGE_SECONDS,
+    SERVER_WORKERS
+)
+
+
+def _get_max_workers() -> int:
+    """Number of extraction processes, bounded so rendering doesn't oversubscribe the host"""
+    return min(os.cpu_count() or 1, PDF_EXTRACTION_MAX_WORKERS)
+
+
+class ImageStaticFiles(StaticFiles):
+    """
+    Static file server for analysis images
+    Starlette handles path traversal, ETag and 304 responses; this adds browser caching
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = f"public, max-age={IMAGE_CACHE_MAX_AGE_SECONDS}"
+        return response
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Own the process pool used for CPU-bound PDF extraction
+    Keeps extraction off the event loop so concurrent requests are not serialized
+    Workers are spawned, not forked: they start on demand, possibly after this process has
+    initialized CUDA and started threads, and forking such a process is unsafe
+    """
+    with ProcessPoolExecutor(
+        max_workers=_get_max_workers(),
+        mp_context=multiprocessing.get_context("spawn")
+    ) as process_pool:
+        app.state.process_pool = process_pool
+        yield
+
 
 app = FastAPI(
     title="Paper Analysis API",
-    description="Analyze academic papers with Gemini Flash 2.5 using multi-turn conversation",
-    version="1.0.0"
+    description="Analyze academic papers with Gemini Flash 2.5 using a single multimodal request",
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson serializes large markdown payloads several times faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration for web access
@@ -21,11 +71,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Analysis-Id"],
 )
 
 # Include API routes
 app.include_router(router)
 
+# Serve page and figure images referenced from analysis markdown
+os.makedirs(OUTPUT_BASE_DIR, exist_ok=True)
+app.mount(
+    "/api/v1/images",
+    ImageStaticFiles(directory=str(OUTPUT_BASE_DIR)),
+    name="images"
+)
+
 
 @app.get("/")
 async def root():
@@ -57,9 +116,13 @@ async def health_check():
 if __name__ == "__main__":
     import uvicorn
 
+    # Reload watches files and forces a single process, so it is opt-in for development
+    dev_mode = os.getenv("DEV") == "1"
+
     uvicorn.run(
-        "main:app",
+        "paper_analysis_api.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=dev_mode,
+        workers=1 if dev_mode else SERVER_WORKERS
     )
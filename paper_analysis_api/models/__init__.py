@@ -2,7 +2,7 @@
 Models package for Paper Analysis API
 """
 
-from .domain import PageData, AnalysisResult
+from .domain import PageData, PagesBatch, AnalysisResult
 from .schemas import AnalysisRequest, AnalysisResponse
 
-__all__ = ["PageData", "AnalysisResult", "AnalysisRequest", "AnalysisResponse"]
+__all__ = ["PageData", "PagesBatch", "AnalysisResult", "AnalysisRequest", "AnalysisResponse"]
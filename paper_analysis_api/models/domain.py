@@ -3,12 +3,13 @@ Domain models representing core business entities
 Immutable data structures for type safety and predictability
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PageData:
     """
     Represents a single page extracted from PDF
@@ -21,14 +22,76 @@ class PageData:
     figure_paths: Tuple[Path, ...] = ()  # Paths to extracted figure images
 
     def __post_init__(self):
-        """Validate page data on creation"""
+        """
+        Validate page data on creation
+        Image existence is not re-checked here: the producer writes the image before
+        constructing the page, and a stat per page would sit on the extraction hot path
+        """
         if self.page_number < 1:
             raise ValueError(f"Page number must be positive, got {self.page_number}")
-        if not self.image_path.exists():
-            raise FileNotFoundError(f"Image file not found: {self.image_path}")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class PagesBatch:
+    """
+    Rendered pages stored as parallel tuples (structure of arrays)
+    Lets the layout detector take every page image at once; converted to PageData at the end
+    """
+    page_numbers: Tuple[int, ...]
+    texts: Tuple[str, ...]
+    image_paths: Tuple[Path, ...]
+    figure_paths: Tuple[Tuple[Path, ...], ...]
+    detection_images: Tuple[np.ndarray, ...] = ()  # Empty unless the layout model will run
+
+    def __post_init__(self):
+        """Validate that all per-page fields are parallel"""
+        page_count = len(self.page_numbers)
+        fields = [self.texts, self.image_paths, self.figure_paths]
+        if self.detection_images:
+            fields.append(self.detection_images)
+
+        if any(len(field) != page_count for field in fields):
+            raise ValueError("All per-page fields must have one entry per page")
+
+    def __len__(self) -> int:
+        return len(self.page_numbers)
+
+    @classmethod
+    def concat(cls, batches: Sequence["PagesBatch"]) -> "PagesBatch":
+        """Join batches in order into one batch"""
+        return cls(
+            page_numbers=tuple(n for batch in batches for n in batch.page_numbers),
+            texts=tuple(text for batch in batches for text in batch.texts),
+            image_paths=tuple(path for batch in batches for path in batch.image_paths),
+            figure_paths=tuple(paths for batch in batches for paths in batch.figure_paths),
+            detection_images=tuple(image for batch in batches for image in batch.detection_images)
+        )
+
+    def with_figure_paths(self, figure_paths: Sequence[Sequence[Path]]) -> "PagesBatch":
+        """Return a copy carrying detected figures, dropping the no longer needed detection images"""
+        return replace(
+            self,
+            figure_paths=tuple(tuple(paths) for paths in figure_paths),
+            detection_images=()
+        )
+
+    def to_page_data(self) -> List[PageData]:
+        """Convert to one PageData per page"""
+        return [
+            PageData(
+                page_number=page_number,
+                text_content=text,
+                image_path=image_path,
+                image_filename=image_path.name,
+                figure_paths=figure_paths
+            )
+            for page_number, text, image_path, figure_paths in zip(
+                self.page_numbers, self.texts, self.image_paths, self.figure_paths
+            )
+        ]
+
+
+@dataclass(frozen=True, slots=True)
 class AnalysisResult:
     """
     Represents the result of paper analysis
@@ -1,75 +1,214 @@
 """
 Gemini analysis service
-Handles multi-turn conversation with Gemini for paper analysis
+Handles multimodal Gemini requests for paper analysis
 Single Responsibility: Gemini API interaction only
 """
 
+import asyncio
+import functools
+import os
+import random
 import time
-from pathlib import Path
-from typing import List, Callable, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Callable, Any, AsyncIterator, Dict, Optional, Tuple
 import google.generativeai as genai
+from google.generativeai import caching
+from google.api_core.exceptions import TooManyRequests
 import ssl
 
 from ..models.domain import PageData, AnalysisResult
+from ..utils.rate_limiter import TokenBucket
 from ..config import (
     GEMINI_API_KEY,
     GEMINI_MODEL_NAME,
     GEMINI_FALLBACK_MODEL,
-    GEMINI_RATE_LIMIT_DELAY,
     TEMPLATE_PATH,
     TEMPLATE_INSTRUCTIONS,
     FINAL_ANALYSIS_REQUEST,
-    TEXT_TRUNCATE_LENGTH
+    TEXT_TRUNCATE_LENGTH,
+    TEMPLATE_PREVIEW_LENGTH,
+    GEMINI_UPLOAD_MAX_WORKERS,
+    GEMINI_RPM,
+    SERVER_WORKERS,
+    GEMINI_RETRY_JITTER_FACTOR,
+    GEMINI_RETRY_BASE_BACKOFF_MS,
+    GEMINI_RETRY_MAX_BACKOFF_MS,
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS,
+    GEMINI_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
 )
 
+# Configured once per process so every request reuses the same client and connection pool
+genai.configure(api_key=GEMINI_API_KEY)
+
+# Context caches keyed by model name: (cache or None if creation failed, monotonic expiry)
+_preamble_caches: Dict[str, Tuple[Optional[caching.CachedContent], float]] = {}
+_preamble_cache_lock = asyncio.Lock()
+
+# Shared by every request in this process; each server worker process gets an equal share of the quota
+_request_limiter = TokenBucket(max(1, GEMINI_RPM // SERVER_WORKERS))
+
+
+def _retry_after_seconds(error: TooManyRequests) -> Optional[float]:
+    """Extract the server-suggested retry delay from a quota error, if any"""
+    response_headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after = response_headers.get("retry-after")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+
+    for detail in error.details or []:
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    return None
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """Exponential backoff for a zero-based retry attempt: 1s, 2s, 4s, ... capped"""
+    return min(GEMINI_RETRY_BASE_BACKOFF_MS * (2 ** attempt), GEMINI_RETRY_MAX_BACKOFF_MS) / 1000.0
+
+
+def _with_jitter(wait_time: float) -> float:
+    """Randomize a wait time so concurrent retries don't fire in lockstep"""
+    return wait_time * random.uniform(1 - GEMINI_RETRY_JITTER_FACTOR, 1 + GEMINI_RETRY_JITTER_FACTOR)
+
+
+def _quota_wait_seconds(error: TooManyRequests, attempt: int) -> float:
+    """
+    Wait before retrying a quota error
+    A server-suggested delay is a floor, so it is only ever lengthened by jitter
+    """
+    retry_after = _retry_after_seconds(error)
+    if retry_after is None:
+        return _with_jitter(_backoff_seconds(attempt))
+
+    return retry_after * random.uniform(1, 1 + GEMINI_RETRY_JITTER_FACTOR)
+
+
+def _ensure_stream_has_text(first_chunk: Any) -> None:
+    """
+    Raise if the first streamed chunk shows that no analysis text will follow
+    A blocked prompt has no candidates; a candidate without parts stopped before any text
+    """
+    if not first_chunk.candidates:
+        raise RuntimeError(f"Prompt was blocked: {first_chunk.prompt_feedback}")
+
+    if not first_chunk.parts:
+        raise RuntimeError(f"Generation stopped before any text: {first_chunk.candidates[0].finish_reason.name}")
+
+
+@functools.lru_cache(maxsize=1)
+def _discover_model_name() -> str:
+    """
+    Discover which Gemini model to use via the model listing API
+    Uses stable Flash 2.5 model, avoids preview and exp versions
+    Memoized because the answer is stable across requests; failures raise and are not cached
+    """
+    available_models = genai.list_models()
+    flash_models = [
+        m for m in available_models
+        if 'flash' in m.name.lower()
+    ]
+
+    # Find Flash 2.5 stable (exclude preview and exp)
+    flash_25_stable = [
+        m for m in flash_models
+        if ('2.5' in m.name or '2-5' in m.name)
+        and 'preview' not in m.name.lower()
+        and 'exp' not in m.name.lower()
+    ]
+
+    if flash_25_stable:
+        return flash_25_stable[0].name.split('/')[-1]
+
+    # Use configured stable model
+    return GEMINI_MODEL_NAME
+
+
+def _resolve_model_name() -> str:
+    """Determine which Gemini model to use, falling back when discovery fails"""
+    try:
+        return _discover_model_name()
+    except Exception:
+        return GEMINI_FALLBACK_MODEL
+
+
+@functools.lru_cache(maxsize=1)
+def _load_template_cached() -> str:
+    """Read template.md once per process; it is static configuration"""
+    try:
+        with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+@functools.lru_cache(maxsize=1)
+def _build_preamble() -> Tuple[str, ...]:
+    """
+    Build the fixed instruction preamble once per process
+    TEMPLATE_INSTRUCTIONS has no placeholders, so it is used verbatim rather than formatted per request
+    """
+    template_content = _load_template_cached()
+    if not template_content:
+        return (TEMPLATE_INSTRUCTIONS,)
+
+    return (TEMPLATE_INSTRUCTIONS, template_content[:TEMPLATE_PREVIEW_LENGTH])
+
+
+def _create_preamble_cache(
+    model_name: str,
+    preamble: List[str]
+) -> Optional[caching.CachedContent]:
+    """Create a Gemini context cache for the preamble, or None if the model or size is unsupported"""
+    try:
+        return caching.CachedContent.create(
+            model=model_name,
+            contents=preamble,
+            ttl=GEMINI_CONTEXT_CACHE_TTL_SECONDS
+        )
+    except Exception:
+        return None
+
+
+async def _get_cached_preamble(
+    model_name: str,
+    preamble: List[str]
+) -> Optional[caching.CachedContent]:
+    """
+    Return the context cache holding the fixed preamble, creating it when missing or expiring
+    A failed creation is remembered for one TTL so requests don't retry it every time
+    """
+    async with _preamble_cache_lock:
+        cached_preamble, expires_at = _preamble_caches.get(model_name, (None, 0.0))
+        if time.monotonic() < expires_at:
+            return cached_preamble
+
+        cached_preamble = await asyncio.to_thread(_create_preamble_cache, model_name, preamble)
+        _preamble_caches[model_name] = (
+            cached_preamble,
+            time.monotonic() + GEMINI_CONTEXT_CACHE_TTL_SECONDS - GEMINI_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
+        )
+        return cached_preamble
+
 
 class GeminiAnalysisService:
     """
-    Service for analyzing papers using Gemini multi-turn conversation
+    Service for analyzing papers using a single multimodal Gemini request
     Immutable configuration, handles API communication
     """
 
     def __init__(self):
-        """Initialize Gemini analysis service with API configuration"""
-        genai.configure(api_key=GEMINI_API_KEY)
-        self._model_name = self._determine_model_to_use()
+        """Initialize Gemini analysis service with the resolved model"""
+        self._model_name = _resolve_model_name()
 
-    def _determine_model_to_use(self) -> str:
-        """
-        Determine which Gemini model to use
-        Uses stable Flash 2.5 model, avoids preview and exp versions
-        """
-        try:
-            available_models = genai.list_models()
-            flash_models = [
-                m for m in available_models
-                if 'flash' in m.name.lower()
-            ]
-
-            # Find Flash 2.5 stable (exclude preview and exp)
-            flash_25_stable = [
-                m for m in flash_models
-                if ('2.5' in m.name or '2-5' in m.name)
-                and 'preview' not in m.name.lower()
-                and 'exp' not in m.name.lower()
-            ]
-
-            if flash_25_stable:
-                return flash_25_stable[0].name.split('/')[-1]
-
-            # Use configured stable model
-            return GEMINI_MODEL_NAME
-
-        except Exception:
-            return GEMINI_FALLBACK_MODEL
-
-    def analyze_paper(
+    async def analyze_paper(
         self,
         pages_data: List[PageData],
         pdf_filename: str
     ) -> AnalysisResult:
         """
-        Analyze paper using multi-turn Gemini conversation
+        Analyze paper using a single multimodal Gemini request
 
         Args:
             pages_data: List of extracted page data
@@ -81,25 +220,51 @@ class GeminiAnalysisService:
         Raises:
             RuntimeError: If Gemini API fails
         """
-        template_content = self._load_template()
-        chat = self._initialize_chat()
-
-        self._send_initial_instructions(chat, template_content)
-        self._send_pages_sequentially(chat, pages_data)
-        analysis_text = self._request_final_analysis(chat, len(pages_data))
+        prompt_parts = await self._build_unified_prompt(pages_data)
+        analysis_text = await self._request_analysis(prompt_parts)
 
-        return self._create_analysis_result(
+        return self.create_analysis_result(
             analysis_text,
             pdf_filename,
             len(pages_data)
         )
 
-    def _retry_on_error(self, func: Callable, *args, max_retries: int = 3, **kwargs) -> Any:
+    async def stream_analysis(self, pages_data: List[PageData]) -> AsyncIterator[str]:
+        """
+        Start streaming analysis markdown from Gemini
+        Uploads, the request and the first chunk are awaited here, so failures raise
+        before the caller commits to a response instead of truncating one
+
+        Args:
+            pages_data: List of extracted page data
+
+        Returns:
+            Async iterator of markdown text chunks in generation order
+
+        Raises:
+            RuntimeError: If Gemini API fails to start the stream
+        """
+        prompt_parts = await self._build_unified_prompt(pages_data)
+        first_chunk, remaining_chunks = await self._open_analysis_stream(prompt_parts)
+
+        return self._relay_chunks(first_chunk, remaining_chunks)
+
+    async def _relay_chunks(self, first_chunk: Any, remaining_chunks: AsyncIterator) -> AsyncIterator[str]:
+        """Yield the text of the already received first chunk, then of the rest of the stream"""
+        yield first_chunk.text
+
+        async for chunk in remaining_chunks:
+            if chunk.parts:
+                yield chunk.text
+
+    async def _retry_on_error(self, func: Callable, *args, max_retries: int = 3, **kwargs) -> Any:
         """
-        Retry function on SSL and network errors
+        Retry coroutine function on SSL, network and quota (429) errors
+        Waits use jittered exponential backoff; quota errors wait at least the
+        server-suggested delay when one is provided
 
         Args:
-            func: Function to retry
+            func: Coroutine function to retry
             max_retries: Maximum number of retry attempts
             *args, **kwargs: Arguments to pass to the function
 
@@ -112,96 +277,107 @@ class GeminiAnalysisService:
         last_error = None
         for attempt in range(max_retries):
             try:
-                return func(*args, **kwargs)
+                return await func(*args, **kwargs)
+            except TooManyRequests as e:
+                last_error = e
+                error_kind = "Rate limited"
+                wait_time = _quota_wait_seconds(e, attempt)
             except (ssl.SSLError, ConnectionError, TimeoutError, OSError) as e:
                 last_error = e
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 2  # Exponential backoff: 2s, 4s, 6s
-                    print(f"Network error (attempt {attempt + 1}/{max_retries}): {e}. Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    raise RuntimeError(f"Failed after {max_retries} retries: {e}") from last_error
+                error_kind = "Network error"
+                wait_time = _with_jitter(_backoff_seconds(attempt))
             except Exception as e:
                 # For non-network errors, fail immediately
                 raise RuntimeError(f"Analysis failed: {e}") from e
 
+            if attempt < max_retries - 1:
+                print(f"{error_kind} (attempt {attempt + 1}/{max_retries}): {last_error}. Retrying in {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+
         raise RuntimeError(f"Failed after {max_retries} retries: {last_error}") from last_error
 
-    def _load_template(self) -> str:
-        """Load template content from file"""
-        try:
-            with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
-                return f.read()
-        except FileNotFoundError:
-            return ""
+    async def _create_model(self) -> Tuple[genai.GenerativeModel, List[str]]:
+        """
+        Create the Gemini model, serving the preamble from the context cache when available
+        Called right before each generate call, after uploads and rate limiting, so the
+        cache handle can't expire while the request is still waiting
 
-    def _initialize_chat(self) -> genai.ChatSession:
-        """Initialize Gemini chat session"""
-        model = genai.GenerativeModel(self._model_name)
-        return model.start_chat(history=[])
+        Returns:
+            Model to query and the preamble parts that must still be sent inline
+        """
+        preamble = list(_build_preamble())
+        cached_preamble = await _get_cached_preamble(self._model_name, preamble)
 
-    def _send_initial_instructions(
-        self,
-        chat: genai.ChatSession,
-        template_content: str
-    ) -> None:
-        """Send initial instructions and template to Gemini with retry logic"""
-        template_preview = template_content[:2000] if template_content else "..."
-
-        initial_prompt = TEMPLATE_INSTRUCTIONS.format(
-            template_content=template_preview
-        )
+        if cached_preamble is None:
+            return genai.GenerativeModel(self._model_name), preamble
 
-        def send_message():
-            chat.send_message(initial_prompt)
-            time.sleep(GEMINI_RATE_LIMIT_DELAY)
+        return genai.GenerativeModel.from_cached_content(cached_preamble), []
 
-        self._retry_on_error(send_message)
+    async def _build_unified_prompt(self, pages_data: List[PageData]) -> List:
+        """
+        Build a single multimodal prompt covering all pages and the final request
+        The preamble is added per attempt by _create_model, either inline or from the context cache
 
-    def _send_pages_sequentially(
-        self,
-        chat: genai.ChatSession,
-        pages_data: List[PageData]
-    ) -> None:
-        """Send each page with image and text to Gemini"""
-        for page_data in pages_data:
-            self._send_single_page(chat, page_data)
-
-    def _send_single_page(
-        self,
-        chat: genai.ChatSession,
-        page_data: PageData
-    ) -> None:
-        """Send a single page to Gemini with text and image with retry logic"""
-        truncated_text = self._truncate_text(page_data.text_content)
-
-        page_message = self._construct_page_message(
-            page_data.page_number,
-            truncated_text,
-            page_data.image_path,
-            len(page_data.figure_paths)
-        )
+        Returns:
+            List of prompt parts (text and uploaded images)
+        """
+        uploaded_files = await self._upload_images_parallel(pages_data)
+
+        page_parts = [
+            part
+            for page_data in pages_data
+            for part in self._construct_page_message(
+                page_data.page_number,
+                self._truncate_text(page_data.text_content),
+                uploaded_files[page_data.page_number],
+                len(page_data.figure_paths)
+            )
+        ]
 
-        def send_page():
-            chat.send_message(page_message)
-            time.sleep(GEMINI_RATE_LIMIT_DELAY)
+        return [*page_parts, FINAL_ANALYSIS_REQUEST]
 
-        try:
-            self._retry_on_error(send_page)
-        except RuntimeError as e:
-            raise RuntimeError(
-                f"Failed to send page {page_data.page_number}: {e}"
-            ) from e
+    async def _upload_images_parallel(self, pages_data: List[PageData]) -> Dict[int, Any]:
+        """
+        Upload all page images in a bounded thread pool
+        Uploads are blocking HTTPS calls that release the GIL, so they overlap well in threads
+
+        Returns:
+            Dictionary mapping page number to uploaded file handle
+        """
+        loop = asyncio.get_running_loop()
+        max_workers = min(os.cpu_count() or 1, GEMINI_UPLOAD_MAX_WORKERS)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            uploaded_files = await asyncio.gather(*[
+                loop.run_in_executor(executor, genai.upload_file, str(page_data.image_path))
+                for page_data in pages_data
+            ])
+
+        return {
+            page_data.page_number: uploaded_file
+            for page_data, uploaded_file in zip(pages_data, uploaded_files)
+        }
 
     def _truncate_text(self, text: str) -> str:
-        """Truncate text to reasonable length for API"""
-        return text[:TEXT_TRUNCATE_LENGTH]
+        """
+        Truncate text to reasonable length for API
+        Short text is returned as-is; long text is cut at the last whitespace to avoid splitting a word
+        """
+        if len(text) <= TEXT_TRUNCATE_LENGTH:
+            return text
+
+        word_boundary = max(
+            text.rfind(" ", 0, TEXT_TRUNCATE_LENGTH),
+            text.rfind("\n", 0, TEXT_TRUNCATE_LENGTH)
+        )
+        cut_position = word_boundary if word_boundary > 0 else TEXT_TRUNCATE_LENGTH
+        return text[:cut_position]
 
     def _construct_page_message(
         self,
         page_number: int,
         text_content: str,
-        image_path: Path,
+        uploaded_file: Any,
         figure_count: int
     ) -> List:
         """
@@ -210,8 +386,6 @@ class GeminiAnalysisService:
         Returns:
             List of message parts (text and image)
         """
-        uploaded_file = genai.upload_file(str(image_path))
-
         figure_info = f"\n**이 페이지의 Figure 개수: {figure_count}개**\n" if figure_count > 0 else ""
 
         return [
@@ -222,26 +396,46 @@ class GeminiAnalysisService:
             f"\n[Page {page_number} 이미지 - 이 페이지의 모든 Figure, 그래프, 수식을 확인하세요]{figure_info}\n"
         ]
 
-    def _request_final_analysis(
-        self,
-        chat: genai.ChatSession,
-        total_pages: int
-    ) -> str:
-        """Request final comprehensive analysis from Gemini with retry logic"""
-        final_prompt = FINAL_ANALYSIS_REQUEST.format(
-            total_pages=total_pages
-        )
-
-        def request_analysis():
-            response = chat.send_message(final_prompt)
+    async def _request_analysis(self, prompt_parts: List) -> str:
+        """Request comprehensive analysis from Gemini in one call with retry logic"""
+        async def request_analysis():
+            await _request_limiter.acquire()
+            model, inline_preamble = await self._create_model()
+            response = await model.generate_content_async([*inline_preamble, *prompt_parts])
             return response.text
 
         try:
-            return self._retry_on_error(request_analysis)
+            return await self._retry_on_error(request_analysis)
+        except RuntimeError as e:
+            raise RuntimeError(f"Failed to get analysis: {e}") from e
+
+    async def _open_analysis_stream(self, prompt_parts: List) -> Tuple[Any, AsyncIterator]:
+        """
+        Start a streaming analysis request and wait for its first chunk, with retry logic
+        Only this part is retried; chunks already sent to a client can't be replayed
+
+        Returns:
+            First chunk, which always carries text, and an iterator over the remaining chunks
+        """
+        async def open_stream():
+            await _request_limiter.acquire()
+            model, inline_preamble = await self._create_model()
+            response = await model.generate_content_async([*inline_preamble, *prompt_parts], stream=True)
+            chunks = response.__aiter__()
+            try:
+                first_chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                raise RuntimeError("Gemini returned an empty stream") from None
+
+            _ensure_stream_has_text(first_chunk)
+            return first_chunk, chunks
+
+        try:
+            return await self._retry_on_error(open_stream)
         except RuntimeError as e:
-            raise RuntimeError(f"Failed to get final analysis: {e}") from e
+            raise RuntimeError(f"Failed to start analysis stream: {e}") from e
 
-    def _create_analysis_result(
+    def create_analysis_result(
         self,
         markdown_content: str,
         pdf_filename: str,
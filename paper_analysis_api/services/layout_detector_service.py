@@ -5,10 +5,12 @@ Single Responsibility: Layout-based figure extraction
 """
 
 import os
+import threading
+from contextlib import nullcontext
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 import fitz  # PyMuPDF
-from PIL import Image
 import numpy as np
 
 try:
@@ -20,6 +22,96 @@ try:
 except ImportError:
     DETECTRON2_AVAILABLE = False
 
+from ..config import (
+    LAYOUT_DETECTION_BATCH_SIZE,
+    LAYOUT_DETECTOR_PRECISION,
+    LAYOUT_DETECTOR_PROPOSALS_PER_IMAGE,
+    LAYOUT_DETECTOR_SCORE_THRESHOLD,
+    LAYOUT_DETECTOR_WARMUP_SHAPE
+)
+from ..models.domain import PagesBatch
+from ..utils.image_processor import pixmap_to_rgb_array, save_pngs, write_files
+
+_predictor_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _build_predictor():
+    """
+    Build the detectron2 predictor once per process
+    Loading weights and allocating device memory takes seconds, so it must not happen per request
+
+    Returns:
+        DefaultPredictor, or None if the model cannot be loaded
+    """
+    try:
+        cfg = get_cfg()
+        cfg.merge_from_file(model_zoo.get_config_file(
+            "COCO-InstanceSegmentation/mask_rcnn_R_50_FPN_3x.yaml"
+        ))
+        # Threshold inside the model so NMS only sees confident boxes
+        cfg.MODEL.ROI_HEADS.SCORE_THRESH_TEST = LAYOUT_DETECTOR_SCORE_THRESHOLD
+        # Only boxes and scores are used, so skip the mask head; pages hold few figures
+        cfg.MODEL.MASK_ON = False
+        cfg.MODEL.RPN.POST_NMS_TOPK_TEST = LAYOUT_DETECTOR_PROPOSALS_PER_IMAGE
+        cfg.MODEL.WEIGHTS = model_zoo.get_checkpoint_url(
+            "COCO-InstanceSegmentation/mask_rcnn_R_50_FPN_3x.yaml"
+        )
+        cfg.MODEL.DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+        predictor = DefaultPredictor(cfg)
+        if cfg.MODEL.DEVICE == "cuda":
+            _warm_up(predictor)
+
+        return predictor
+    except Exception:
+        return None
+
+
+def _warm_up(predictor) -> None:
+    """
+    Run one dummy forward pass so CUDA context setup, kernel loading and cuDNN autotuning
+    happen while the model loads instead of on the first request's pages
+    Detection inputs have stable shapes, so cuDNN benchmark mode's algorithm choices are reused
+    """
+    torch.backends.cudnn.benchmark = True
+
+    dummy_image = np.zeros((*LAYOUT_DETECTOR_WARMUP_SHAPE, 3), dtype=np.uint8)
+    with torch.inference_mode(), _autocast_context(_select_autocast_dtype(predictor)):
+        predictor(dummy_image)
+
+
+def _autocast_context(autocast_dtype: Optional["torch.dtype"]):
+    """Autocast context for reduced-precision GPU inference, or a no-op in FP32"""
+    if autocast_dtype is None:
+        return nullcontext()
+
+    return torch.autocast("cuda", dtype=autocast_dtype)
+
+
+def _select_autocast_dtype(predictor) -> Optional["torch.dtype"]:
+    """
+    Pick the reduced-precision dtype for GPU inference, or None to run in FP32
+    BF16 runs on tensor cores with FP32's exponent range, so detections are unaffected;
+    GPUs without BF16 support fall back to FP16, which their tensor cores do accelerate
+    """
+    if predictor is None or predictor.cfg.MODEL.DEVICE != "cuda":
+        return None
+
+    if LAYOUT_DETECTOR_PRECISION == "bf16" and torch.cuda.is_bf16_supported():
+        return torch.bfloat16
+
+    if LAYOUT_DETECTOR_PRECISION in ("bf16", "fp16"):
+        return torch.float16
+
+    return None
+
+
+def _get_shared_predictor():
+    """Return the process-wide predictor, serializing first-time construction across threads"""
+    with _predictor_lock:
+        return _build_predictor()
+
 
 class LayoutDetectorService:
     """
@@ -27,135 +119,203 @@ class LayoutDetectorService:
     Falls back to simple extraction if detectron2 not available
     """
 
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, use_layout_model: bool = True):
         """
         Initialize layout detector service
 
         Args:
             output_dir: Directory where figure images will be saved
+            use_layout_model: Load the detectron2 model; when False only embedded images are extracted
         """
         self._output_dir = output_dir
-        self._predictor = self._initialize_predictor() if DETECTRON2_AVAILABLE else None
-
-    def _initialize_predictor(self):
-        """Initialize detectron2 predictor for layout detection"""
-        try:
-            cfg = get_cfg()
-            cfg.merge_from_file(model_zoo.get_config_file(
-                "COCO-InstanceSegmentation/mask_rcnn_R_50_FPN_3x.yaml"
-            ))
-            cfg.MODEL.ROI_HEADS.SCORE_THRESH_TEST = 0.5
-            cfg.MODEL.WEIGHTS = model_zoo.get_checkpoint_url(
-                "COCO-InstanceSegmentation/mask_rcnn_R_50_FPN_3x.yaml"
+        self._predictor = _get_shared_predictor() if DETECTRON2_AVAILABLE and use_layout_model else None
+        self._autocast_dtype = _select_autocast_dtype(self._predictor)
+
+    @property
+    def has_layout_model(self) -> bool:
+        """Whether figures are found by the detectron2 model rather than embedded-image extraction"""
+        return self._predictor is not None
+
+    def extract_figures_batch(self, pages_batch: PagesBatch) -> List[List[Path]]:
+        """
+        Extract figures from prerendered pages using layout detection
+        Pages are run through the detector in batches so one forward pass covers many pages
+
+        Args:
+            pages_batch: Rendered pages with detection images at LAYOUT_DETECTION_SCALE
+
+        Returns:
+            List of figure image paths for each page, in batch order
+        """
+        img_arrays = pages_batch.detection_images
+        page_numbers = pages_batch.page_numbers
+
+        figure_paths_per_page = []
+        for start in range(0, len(img_arrays), LAYOUT_DETECTION_BATCH_SIZE):
+            batch_end = start + LAYOUT_DETECTION_BATCH_SIZE
+            figure_paths_per_page.extend(
+                self._extract_with_layout_detection(img_arrays[start:batch_end], page_numbers[start:batch_end])
             )
-            cfg.MODEL.DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
-            return DefaultPredictor(cfg)
-        except Exception:
-            return None
+        return figure_paths_per_page
 
-    def extract_figures_from_page(
+    def collect_embedded_figures(
         self,
         doc: fitz.Document,
         page: fitz.Page,
-        page_number: int
-    ) -> List[Path]:
+        page_number: int,
+        display_list: fitz.DisplayList,
+        text_page: fitz.TextPage
+    ) -> Tuple[List[Tuple[Path, np.ndarray]], List[Tuple[Path, bytes]]]:
         """
-        Extract figures from a PDF page using layout detection
+        Collect embedded figure images from a PDF page without the layout model
+        Only the PyMuPDF work happens here and nothing is written, so callers can hold the
+        PyMuPDF lock for just this call and save the result with save_embedded_figures
 
         Args:
             doc: PDF document
             page: PDF page object
             page_number: One-based page number
+            display_list: Display list recorded from the page, reused for rendering crops
+            text_page: Text page with image blocks, built from the same display list
 
         Returns:
-            List of paths to extracted figure images
+            Rendered crops to encode as PNG, and already-encoded image files to write
         """
-        if self._predictor:
-            return self._extract_with_layout_detection(page, page_number)
-        else:
-            return self._extract_embedded_images(doc, page, page_number)
+        return self._extract_embedded_images(doc, page, page_number, display_list, text_page)
 
-    def _extract_with_layout_detection(
+    def save_embedded_figures(
         self,
-        page: fitz.Page,
-        page_number: int
+        crops: List[Tuple[Path, np.ndarray]],
+        files: List[Tuple[Path, bytes]]
     ) -> List[Path]:
         """
-        Extract figures using detectron2 layout detection
+        Encode and write figures returned by collect_embedded_figures
+
+        Returns:
+            Paths of the saved figures; image files that could not be written are left out
+        """
+        save_pngs(crops)
+        return [figure_path for figure_path, _ in crops] + write_files(files)
+
+    def _extract_with_layout_detection(
+        self,
+        img_arrays: Sequence[np.ndarray],
+        page_numbers: Sequence[int]
+    ) -> List[List[Path]]:
+        """
+        Extract figures from a batch of pages using detectron2 layout detection
 
         Args:
-            page: PDF page object
-            page_number: One-based page number
+            img_arrays: Pages rendered as RGB arrays
+            page_numbers: One-based page numbers, parallel to img_arrays
 
         Returns:
-            List of paths to extracted figure images
+            List of figure image paths for each page
         """
-        # Convert page to image
-        mat = fitz.Matrix(2, 2)  # 2x scaling
-        pix = page.get_pixmap(matrix=mat)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        img_array = np.array(img)
+        instances_per_page = self._detect_layouts(img_arrays)
 
-        # Detect layouts
-        outputs = self._predictor(img_array)
-        instances = outputs["instances"].to("cpu")
+        crops_per_page = [
+            self._crop_detected_figures(img_array, instances, page_number)
+            for img_array, instances, page_number in zip(img_arrays, instances_per_page, page_numbers)
+        ]
 
-        figure_paths = []
+        # Encode every crop of the batch together
+        save_pngs([crop for crops in crops_per_page for crop in crops])
 
-        # Extract detected regions that might be figures
-        for idx, (box, score) in enumerate(zip(instances.pred_boxes, instances.scores)):
-            if score < 0.7:  # Confidence threshold
-                continue
+        return [[figure_path for figure_path, _ in crops] for crops in crops_per_page]
+
+    def _detect_layouts(self, img_arrays: Sequence[np.ndarray]) -> list:
+        """
+        Run the detector on several images in one forward pass
+        Calls the underlying model directly because DefaultPredictor only accepts one image;
+        the model pads and stacks the batch itself
+
+        Returns:
+            Detected instances on CPU for each image
+        """
+        model_inputs = [self._to_model_input(img_array) for img_array in img_arrays]
+
+        with torch.no_grad(), self._inference_precision():
+            outputs = self._predictor.model(model_inputs)
+
+        return [output["instances"].to("cpu") for output in outputs]
+
+    def _inference_precision(self):
+        """Autocast context for reduced-precision GPU inference, or a no-op in FP32"""
+        return _autocast_context(self._autocast_dtype)
 
-            x1, y1, x2, y2 = [int(coord) for coord in box]
+    def _to_model_input(self, img_array: np.ndarray) -> dict:
+        """Apply DefaultPredictor's preprocessing so batched results match single-image calls"""
+        if self._predictor.input_format == "RGB":
+            img_array = img_array[:, :, ::-1]
 
-            # Crop figure region
+        height, width = img_array.shape[:2]
+        image = self._predictor.aug.get_transform(img_array).apply_image(img_array)
+        image = torch.as_tensor(image.astype("float32").transpose(2, 0, 1))
+
+        return {"image": image, "height": height, "width": width}
+
+    def _crop_detected_figures(
+        self,
+        img_array: np.ndarray,
+        instances,
+        page_number: int
+    ) -> List[Tuple[Path, np.ndarray]]:
+        """
+        Crop detected regions of a rendered page
+        The model already drops boxes below LAYOUT_DETECTOR_SCORE_THRESHOLD
+
+        Returns:
+            (figure path, cropped RGB array) pairs; crops are views into img_array
+        """
+        boxes = instances.pred_boxes.tensor.to(torch.int32).numpy()
+
+        crops = []
+        for idx, (x1, y1, x2, y2) in enumerate(boxes):
             figure_img = img_array[y1:y2, x1:x2]
 
             if figure_img.size == 0:
                 continue
 
-            # Save figure
-            figure_pil = Image.fromarray(figure_img)
-            figure_filename = f"page_{page_number}_figure_{idx}.png"
-            figure_path = self._output_dir / figure_filename
+            figure_path = self._output_dir / f"page_{page_number}_figure_{idx}.png"
+            crops.append((figure_path, figure_img))
 
-            figure_pil.save(str(figure_path))
-            figure_paths.append(figure_path)
-
-        return figure_paths
+        return crops
 
     def _extract_embedded_images(
         self,
         doc: fitz.Document,
         page: fitz.Page,
-        page_number: int
-    ) -> List[Path]:
+        page_number: int,
+        display_list: fitz.DisplayList,
+        text_page: fitz.TextPage
+    ) -> Tuple[List[Tuple[Path, np.ndarray]], List[Tuple[Path, bytes]]]:
         """
-        Extract complete figure images using layout analysis (image blocks)
+        Render complete figure images using layout analysis (image blocks)
 
         Args:
             doc: PDF document
             page: PDF page object
             page_number: One-based page number
+            display_list: Display list recorded from the page
+            text_page: Text page with image blocks
 
         Returns:
-            List of paths to extracted figure images
+            Rendered figure crops, or the fallback's encoded image files
         """
-        figure_paths = []
-
         # Use layout analysis to find image blocks
-        blocks = page.get_text("dict")["blocks"]
+        blocks = text_page.extractDICT()["blocks"]
 
         # Filter for image blocks only
         image_blocks = [b for b in blocks if b.get("type") == 1]  # type 1 = image block
 
         if not image_blocks:
             # Fallback: try to find images using get_images if no blocks found
-            return self._extract_images_fallback(doc, page, page_number)
+            return [], self._extract_images_fallback(doc, page, page_number)
 
-        # Process each image block
+        # Process each image block; crops are encoded by the caller once all are rendered
+        crops = []
         for img_index, block in enumerate(image_blocks):
             try:
                 # Get bounding box of the image block
@@ -180,28 +340,24 @@ class LayoutDetectorService:
                 if width < 100 or height < 50:
                     continue
 
-                # Render the cropped area at high resolution
+                # Render the cropped area at high resolution, as plain RGB for the PNG encoder
                 mat = fitz.Matrix(3, 3)  # 3x zoom for quality
-                pix = page.get_pixmap(matrix=mat, clip=rect)
+                pix = display_list.get_pixmap(matrix=mat, colorspace=fitz.csRGB, alpha=False, clip=rect)
 
-                # Save as PNG
                 figure_filename = f"page_{page_number}_figure_{img_index}.png"
-                figure_path = self._output_dir / figure_filename
-
-                pix.save(str(figure_path))
-                figure_paths.append(figure_path)
+                crops.append((self._output_dir / figure_filename, pixmap_to_rgb_array(pix)))
 
             except Exception:
                 continue
 
-        return figure_paths
+        return crops, []
 
     def _extract_images_fallback(
         self,
         doc: fitz.Document,
         page: fitz.Page,
         page_number: int
-    ) -> List[Path]:
+    ) -> List[Tuple[Path, bytes]]:
         """
         Fallback method: Extract embedded images when layout analysis fails
 
@@ -211,15 +367,16 @@ class LayoutDetectorService:
             page_number: One-based page number
 
         Returns:
-            List of paths to extracted figure images
+            (figure path, encoded image bytes) pairs, not yet written
         """
-        figure_paths = []
         image_list = page.get_images(full=True)
 
         # Only extract if there are very few images (to avoid tiny fragments)
         if len(image_list) > 5:
             return []
 
+        # Collect image bytes only; the caller writes them together, off the decode path
+        pending_files = []
         for img_index, img_info in enumerate(image_list):
             try:
                 xref = img_info[0]
@@ -234,13 +391,8 @@ class LayoutDetectorService:
                         continue
 
                     figure_filename = f"page_{page_number}_figure_{img_index}.{image_ext}"
-                    figure_path = self._output_dir / figure_filename
-
-                    with open(figure_path, "wb") as f:
-                        f.write(image_bytes)
-
-                    figure_paths.append(figure_path)
+                    pending_files.append((self._output_dir / figure_filename, image_bytes))
             except Exception:
                 continue
 
-        return figure_paths
+        return pending_files
@@ -5,31 +5,117 @@ Single Responsibility: PDF processing only
 """
 
 import os
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from functools import cached_property
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 import fitz  # PyMuPDF
-
-from ..models.domain import PageData
-from ..config import PDF_DPI_SCALE, MAX_PAGES_DEFAULT
+import numpy as np
+
+from ..models.domain import PageData, PagesBatch
+from ..config import (
+    PDF_DPI_SCALE,
+    MAX_PAGES_DEFAULT,
+    PDF_EXTRACTION_BLOCK_SIZE,
+    LAYOUT_DETECTION_SCALE,
+    REFERENCE_SEARCH_MAX_PAGES,
+    REFERENCE_HEADING_REGION_RATIO,
+    STORE_SHRINK_PERCENT
+)
+from ..utils.image_processor import pixmap_to_rgb_array, resize_image, save_png
 from .layout_detector_service import LayoutDetectorService
 
 
+# PyMuPDF isn't thread-safe and its resource store is process-global, so every in-process
+# fitz call is serialized; worker processes each have their own copy of the lock
+_pymupdf_lock = threading.RLock()
+
+
+def count_pages(pdf_path: Path) -> int:
+    """
+    Count the pages of a PDF without extracting them
+
+    Raises:
+        ValueError: If PDF cannot be opened
+    """
+    with _pymupdf_lock:
+        try:
+            doc = fitz.open(pdf_path)
+        except Exception as e:
+            raise ValueError(f"Failed to open PDF: {e}")
+
+        try:
+            return len(doc)
+        finally:
+            doc.close()
+
+
+def _render_page_block_in_worker(
+    output_dir: Path,
+    pdf_path: Path,
+    page_indices: range,
+    for_layout_model: bool
+) -> PagesBatch:
+    """
+    Render a block of pages in a worker process; module-level so it can be pickled
+    Workers never load the layout model and are spawned rather than forked,
+    so CUDA stays in the orchestrating process
+    """
+    return PDFExtractionService(output_dir, use_layout_model=False).render_page_block(
+        pdf_path, page_indices, for_layout_model
+    )
+
+
+def _build_text_page(display_list: fitz.DisplayList, include_image_blocks: bool) -> fitz.TextPage:
+    """
+    Build one text page that serves plain text and, when requested, image-block extraction
+    Image blocks are only kept when embedded figures will be read from them, since they cost
+    extra parsing and memory per page
+    Newer PyMuPDF returns the low-level object from DisplayList.get_textpage, so wrap it
+
+    Args:
+        display_list: Display list recorded for the page
+        include_image_blocks: Preserve image blocks for embedded-figure extraction
+
+    Returns:
+        Text page built from the display list
+    """
+    flags = fitz.TEXTFLAGS_DICT if include_image_blocks else fitz.TEXTFLAGS_TEXT
+    text_page = display_list.get_textpage(flags=flags)
+    return text_page if isinstance(text_page, fitz.TextPage) else fitz.TextPage(text_page)
+
+
+def _split_into_blocks(page_count: int, block_size: int) -> List[range]:
+    """Split zero-based page indices into contiguous blocks of at most block_size pages"""
+    return [
+        range(start, min(start + block_size, page_count))
+        for start in range(0, page_count, block_size)
+    ]
+
+
 class PDFExtractionService:
     """
     Service for extracting pages and text from PDF files
     Immutable configuration, pure transformation functions
     """
 
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, use_layout_model: bool = True):
         """
         Initialize PDF extraction service
 
         Args:
             output_dir: Directory where page images will be saved
+            use_layout_model: Detect figures with the layout model when it is available
         """
         self._output_dir = output_dir
+        self._use_layout_model = use_layout_model
         self._ensure_output_directory()
-        self._layout_detector = LayoutDetectorService(output_dir)
+
+    @cached_property
+    def _layout_detector(self) -> LayoutDetectorService:
+        """Layout detector, created on first use so the model loads only when pages are processed"""
+        return LayoutDetectorService(self._output_dir, self._use_layout_model)
 
     def _ensure_output_directory(self) -> None:
         """Create output directory if it doesn't exist"""
@@ -38,7 +124,8 @@ class PDFExtractionService:
     def extract_pages(
         self,
         pdf_path: Path,
-        max_pages: int = None
+        max_pages: int = None,
+        executor: Optional[Executor] = None
     ) -> List[PageData]:
         """
         Extract all pages from PDF as images and text
@@ -48,6 +135,7 @@ class PDFExtractionService:
         Args:
             pdf_path: Path to the PDF file
             max_pages: Optional limit on pages (None = all pages)
+            executor: Optional process pool; pages are then rendered in parallel blocks
 
         Returns:
             List of PageData objects containing page information
@@ -59,25 +147,55 @@ class PDFExtractionService:
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-        doc = self._open_pdf_document(pdf_path)
-        total_pages = len(doc)
+        with _pymupdf_lock:
+            doc = self._open_pdf_document(pdf_path)
+            total_pages = len(doc)
 
-        if total_pages == 0:
-            doc.close()
-            raise ValueError(f"PDF file is empty: {pdf_path}")
+            if total_pages == 0:
+                doc.close()
+                raise ValueError(f"PDF file is empty: {pdf_path}")
+
+            # Extract all pages if max_pages not specified
+            pages_to_extract = total_pages if max_pages is None else min(max_pages, total_pages)
+
+            # Detect and exclude reference section
+            reference_start = self._detect_reference_section(doc, pages_to_extract)
+            if reference_start is not None:
+                pages_to_extract = reference_start
 
-        # Extract all pages if max_pages not specified
-        pages_to_extract = total_pages if max_pages is None else min(max_pages, total_pages)
+        try:
+            return self._extract_pages_from_document(doc, pdf_path, pages_to_extract, executor)
+        finally:
+            with _pymupdf_lock:
+                doc.close()
+
+    def render_page_block(
+        self,
+        pdf_path: Path,
+        page_indices: range,
+        for_layout_model: bool
+    ) -> PagesBatch:
+        """
+        Render a block of pages using a dedicated document handle
+        PyMuPDF documents can't be shared across processes, so each block opens its own
 
-        # Detect and exclude reference section
-        reference_start = self._detect_reference_section(doc, pages_to_extract)
-        if reference_start is not None:
-            pages_to_extract = reference_start
+        Args:
+            pdf_path: Path to the PDF file
+            page_indices: Zero-based page indices to render
+            for_layout_model: Keep detection images for the layout model instead of
+                extracting embedded figures
 
-        pages_data = self._extract_pages_from_document(doc, pages_to_extract)
+        Returns:
+            PagesBatch of the rendered pages in page order
+        """
+        with _pymupdf_lock:
+            doc = self._open_pdf_document(pdf_path)
 
-        doc.close()
-        return pages_data
+        try:
+            return self._render_pages(doc, page_indices, for_layout_model)
+        finally:
+            with _pymupdf_lock:
+                doc.close()
 
     def _open_pdf_document(self, pdf_path: Path) -> fitz.Document:
         """Open PDF document with error handling"""
@@ -89,97 +207,181 @@ class PDFExtractionService:
     def _extract_pages_from_document(
         self,
         doc: fitz.Document,
-        pages_to_extract: int
+        pdf_path: Path,
+        pages_to_extract: int,
+        executor: Optional[Executor]
     ) -> List[PageData]:
-        """Extract multiple pages from PDF document"""
-        pages_data = []
-
-        for page_num in range(pages_to_extract):
-            page_data = self._extract_single_page(doc, page_num)
-            pages_data.append(page_data)
+        """
+        Render pages in blocks and attach figures
+        Blocks render in worker processes when an executor is given, otherwise on a background
+        thread; layout detection runs here on each block as soon as it is rendered, so inference
+        overlaps the rendering of later blocks and the model is loaded only once
+        """
+        use_layout_model = self._layout_detector.has_layout_model
+        page_blocks = _split_into_blocks(pages_to_extract, PDF_EXTRACTION_BLOCK_SIZE)
+
+        if executor is not None:
+            futures = [
+                executor.submit(
+                    _render_page_block_in_worker,
+                    self._output_dir,
+                    pdf_path,
+                    page_indices,
+                    use_layout_model
+                )
+                for page_indices in page_blocks
+            ]
+            return self._collect_rendered_blocks(futures, use_layout_model)
+
+        if not use_layout_model:
+            return self._render_pages(doc, range(pages_to_extract), use_layout_model).to_page_data()
+
+        # A single thread renders, under the PyMuPDF lock, while this one runs detection
+        with ThreadPoolExecutor(max_workers=1) as render_thread:
+            futures = [
+                render_thread.submit(self._render_pages, doc, page_indices, use_layout_model)
+                for page_indices in page_blocks
+            ]
+            return self._collect_rendered_blocks(futures, use_layout_model)
+
+    def _collect_rendered_blocks(
+        self,
+        futures: List[Future],
+        use_layout_model: bool
+    ) -> List[PageData]:
+        """
+        Detect figures on each rendered block as it completes, then merge blocks in page order
+        Remaining blocks are cancelled if any block fails
 
-        return pages_data
+        Args:
+            futures: Futures resolving to one PagesBatch per block
+            use_layout_model: Run layout detection on each block
 
-    def _extract_single_page(
+        Returns:
+            List of PageData objects in page order
+        """
+        pages_batches = []
+        try:
+            for future in as_completed(futures):
+                pages_batch = future.result()
+                if use_layout_model:
+                    figure_paths_per_page = self._layout_detector.extract_figures_batch(pages_batch)
+                    pages_batch = pages_batch.with_figure_paths(figure_paths_per_page)
+                pages_batches.append(pages_batch)
+        finally:
+            for future in futures:
+                future.cancel()
+
+        pages_batches.sort(key=lambda pages_batch: pages_batch.page_numbers[0])
+        return PagesBatch.concat(pages_batches).to_page_data()
+
+    def _render_pages(
         self,
         doc: fitz.Document,
-        page_index: int
-    ) -> PageData:
+        page_indices: range,
+        for_layout_model: bool
+    ) -> PagesBatch:
+        """
+        Render text and page images for the given pages
+        Embedded figures are extracted here only when the layout model won't detect them later
+        """
+        page_numbers = [page_index + 1 for page_index in page_indices]
+
+        texts, image_paths, figure_paths_per_page, detection_images = [], [], [], []
+        for page_index, page_number in zip(page_indices, page_numbers):
+            # Held per page so concurrent requests interleave instead of queueing whole documents
+            with _pymupdf_lock:
+                page = doc[page_index]
+                # Parse the content stream once; text, rendering and figure lookup replay it
+                display_list = page.get_displaylist()
+                text_page = _build_text_page(display_list, include_image_blocks=not for_layout_model)
+
+                texts.append(self._extract_text_from_page(text_page))
+                page_array = self._render_page_to_array(display_list)
+
+                figure_crops, figure_files = [], []
+                if not for_layout_model:
+                    figure_crops, figure_files = self._layout_detector.collect_embedded_figures(
+                        doc, page, page_number, display_list, text_page
+                    )
+
+                # MuPDF caches decoded resources without limit; release them once the page is done
+                del display_list, text_page
+                fitz.TOOLS.store_shrink(STORE_SHRINK_PERCENT)
+
+            # Encoding and writing need no PyMuPDF state, so they run after the lock is released
+            figure_paths = self._layout_detector.save_embedded_figures(figure_crops, figure_files)
+            figure_paths_per_page.append(tuple(figure_paths))
+            image_path, detection_image = self._save_rendered_page(page_array, page_number, for_layout_model)
+            image_paths.append(image_path)
+            if detection_image is not None:
+                detection_images.append(detection_image)
+
+        return PagesBatch(
+            page_numbers=tuple(page_numbers),
+            texts=tuple(texts),
+            image_paths=tuple(image_paths),
+            figure_paths=tuple(figure_paths_per_page),
+            detection_images=tuple(detection_images)
+        )
+
+    def _save_rendered_page(
+        self,
+        page_array: np.ndarray,
+        page_number: int,
+        keep_detection_image: bool
+    ) -> Tuple[Path, Optional[np.ndarray]]:
         """
-        Extract a single page from PDF
+        Save a rendered page and optionally derive its detection image
+        The page is rasterized once; the detection image is downscaled from the same pixels
 
         Args:
-            doc: Open PDF document
-            page_index: Zero-based page index
+            page_array: Page rendered at PDF_DPI_SCALE in RGB order
+            page_number: One-based page number
+            keep_detection_image: Also return the page at the layout detector's scale
 
         Returns:
-            PageData object with page information
-        """
-        page = doc[page_index]
-        page_number = page_index + 1
-
-        text_content = self._extract_text_from_page(page)
-        image_path = self._render_page_to_image(page, page_number)
-        image_filename = image_path.name
-        figure_paths = self._extract_figures_from_page(doc, page, page_number)
-
-        return PageData(
-            page_number=page_number,
-            text_content=text_content,
-            image_path=image_path,
-            image_filename=image_filename,
-            figure_paths=tuple(figure_paths)
-        )
+            Tuple of (saved page image path, detection image or None)
+        """
+        image_path = self._save_page_image(page_array, page_number)
+
+        if not keep_detection_image:
+            return image_path, None
 
-    def _extract_text_from_page(self, page: fitz.Page) -> str:
+        return image_path, resize_image(page_array, LAYOUT_DETECTION_SCALE / PDF_DPI_SCALE)
+
+    def _extract_text_from_page(self, text_page: fitz.TextPage) -> str:
         """Extract text content from page"""
-        return page.get_text()
+        return text_page.extractText()
+
+    def _render_page_to_array(self, display_list: fitz.DisplayList) -> np.ndarray:
+        """Render page to a high-resolution RGB array"""
+        transformation_matrix = fitz.Matrix(PDF_DPI_SCALE, PDF_DPI_SCALE)
+        pixmap = display_list.get_pixmap(matrix=transformation_matrix, alpha=False)
+        return pixmap_to_rgb_array(pixmap)
 
-    def _render_page_to_image(
+    def _save_page_image(
         self,
-        page: fitz.Page,
+        page_array: np.ndarray,
         page_number: int
     ) -> Path:
         """
-        Render page to high-resolution image
+        Save rendered page as PNG
 
         Args:
-            page: PDF page object
+            page_array: Rendered page in RGB order
             page_number: One-based page number for filename
 
         Returns:
             Path to saved image file
         """
-        transformation_matrix = fitz.Matrix(PDF_DPI_SCALE, PDF_DPI_SCALE)
-        pixmap = page.get_pixmap(matrix=transformation_matrix)
-
         image_filename = f"page_{page_number}.png"
         image_path = self._output_dir / image_filename
 
-        pixmap.save(str(image_path))
+        save_png(image_path, page_array)
 
         return image_path
 
-    def _extract_figures_from_page(
-        self,
-        doc: fitz.Document,
-        page: fitz.Page,
-        page_number: int
-    ) -> List[Path]:
-        """
-        Extract figure images from PDF page using layout detection
-        Falls back to PyMuPDF if detectron2 not available
-
-        Args:
-            doc: PDF document
-            page: PDF page object
-            page_number: One-based page number
-
-        Returns:
-            List of paths to extracted figure images
-        """
-        return self._layout_detector.extract_figures_from_page(doc, page, page_number)
-
     def _detect_reference_section(
         self,
         doc: fitz.Document,
@@ -188,6 +390,8 @@ class PDFExtractionService:
         """
         Detect where reference section starts
         Returns page index (0-based) or None if not found
+        References sit at the end of a paper, so only the last pages are scanned,
+        backwards, and only the heading region at the top of each page is read
 
         Args:
             doc: PDF document
@@ -205,12 +409,10 @@ class PDFExtractionService:
             '참고 문헌'
         ]
 
-        for page_num in range(max_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+        first_page_to_scan = max(0, max_pages - REFERENCE_SEARCH_MAX_PAGES)
 
-            # Check first 500 characters for reference heading
-            text_start = text[:500]
+        for page_num in range(max_pages - 1, first_page_to_scan - 1, -1):
+            text_start = self._extract_heading_text(doc[page_num]).lower()
 
             for keyword in reference_keywords:
                 # Look for keyword as a heading (standalone on line)
@@ -218,3 +420,14 @@ class PDFExtractionService:
                     return page_num
 
         return None
+
+    def _extract_heading_text(self, page: fitz.Page) -> str:
+        """Extract only the text in the top region of a page, where section headings appear"""
+        page_rect = page.rect
+        heading_region = fitz.Rect(
+            page_rect.x0,
+            page_rect.y0,
+            page_rect.x1,
+            page_rect.y0 + page_rect.height * REFERENCE_HEADING_REGION_RATIO
+        )
+        return page.get_text("text", clip=heading_region)
@@ -1,9 +1,11 @@
 """
 Simple test client for Paper Analysis API
 Tests the API with the example PDF
+Requires requests and requests-toolbelt (pip install -r requirements-dev.txt)
 """
 
 import requests
+from requests_toolbelt import MultipartEncoder
 from pathlib import Path
 
 # API configuration
@@ -29,9 +31,9 @@ def test_analysis_api():
     print(f"🌐 API URL: {API_URL}\n")
 
     try:
-        # Prepare request
+        # Prepare request; the encoder streams the PDF instead of building the body in memory
         with open(pdf_file, "rb") as f:
-            files = {"file": (pdf_file.name, f, "application/pdf")}
+            encoder = MultipartEncoder(fields={"file": (pdf_file.name, f, "application/pdf")})
             params = {"max_pages": MAX_PAGES}
 
             print("📤 Uploading PDF and requesting analysis...")
@@ -40,9 +42,11 @@ def test_analysis_api():
             # Send request
             response = requests.post(
                 API_URL,
-                files=files,
+                data=encoder,
+                headers={"Content-Type": encoder.content_type},
                 params=params,
-                timeout=600  # 10 minutes timeout
+                timeout=600,  # 10 minutes timeout
+                stream=True
             )
 
         # Check response
@@ -1,11 +1,146 @@
 """
 Image processing utilities
-Handles figure insertion into markdown analysis
+Handles image encoding and figure insertion into markdown analysis
 """
 
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from ..config import PNG_COMPRESSION_LEVEL, FIGURE_WRITE_MAX_WORKERS
+
+# Pattern: Figure X (Page Y, Index Z)
+_FIG_RE = re.compile(r'Figure\s+(\d+)\.?\s*\(Page\s+(\d+),\s*Index\s+(\d+)\)')
+
+# Figure files are named: page_{page_num}_figure_{index}.{ext}
+_FIG_FILE_RE = re.compile(r'page_(\d+)_figure_(\d+)\.')
+
+
+def pixmap_to_rgb_array(pixmap: fitz.Pixmap) -> np.ndarray:
+    """
+    View an alpha-free RGB pixmap as an H x W x 3 array without copying through PIL
+
+    Args:
+        pixmap: Pixmap rendered with alpha=False
+
+    Returns:
+        Read-only uint8 array over the pixmap samples
+    """
+    return np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, 3)
+
+
+def resize_image(rgb_array: np.ndarray, scale: float) -> np.ndarray:
+    """
+    Resize an image by a scale factor, averaging pixels when shrinking
+
+    Args:
+        rgb_array: H x W x 3 uint8 image
+        scale: Factor applied to both dimensions
+
+    Returns:
+        Resized image
+    """
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    return cv2.resize(rgb_array, None, fx=scale, fy=scale, interpolation=interpolation)
+
+
+def save_png(image_path: Path, rgb_array: np.ndarray) -> None:
+    """
+    Save an RGB array as PNG with OpenCV's encoder
+    Uses a low zlib level: encoding speed matters more here than a few percent of file size
+    Encodes in memory and writes with Python, since cv2.imwrite can't open non-ASCII paths on Windows
+
+    Args:
+        image_path: Destination file path
+        rgb_array: H x W x 3 uint8 image in RGB order
+
+    Raises:
+        OSError: If the image could not be written
+    """
+    bgr_array = np.ascontiguousarray(rgb_array[:, :, ::-1])
+    encoded, png_buffer = cv2.imencode(".png", bgr_array, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION_LEVEL])
+    if not encoded:
+        raise OSError(f"Failed to encode image: {image_path}")
+
+    image_path.write_bytes(png_buffer.tobytes())
+
+
+def save_pngs(images: List[Tuple[Path, np.ndarray]]) -> None:
+    """
+    Encode and save several RGB arrays as PNG concurrently; OpenCV releases the GIL while encoding
+
+    Args:
+        images: (destination path, RGB array) pairs
+
+    Raises:
+        OSError: If any image could not be written
+    """
+    if len(images) <= 1:
+        for image_path, rgb_array in images:
+            save_png(image_path, rgb_array)
+        return
+
+    list(_get_write_executor().map(lambda image: save_png(*image), images))
+
+
+def write_files(files: List[Tuple[Path, bytes]]) -> List[Path]:
+    """
+    Write already-encoded files concurrently; file writes release the GIL
+
+    Args:
+        files: (destination path, file contents) pairs
+
+    Returns:
+        Paths that were written successfully, in input order
+    """
+    if len(files) <= 1:
+        written = [_try_write_file(file) for file in files]
+    else:
+        written = list(_get_write_executor().map(_try_write_file, files))
+
+    return [path for (path, _), ok in zip(files, written) if ok]
+
+
+@lru_cache(maxsize=1)
+def _get_write_executor() -> ThreadPoolExecutor:
+    """Create the figure-writing thread pool on first use and share it across calls"""
+    return ThreadPoolExecutor(max_workers=FIGURE_WRITE_MAX_WORKERS, thread_name_prefix="figure-writer")
+
+
+def _try_write_file(file: Tuple[Path, bytes]) -> bool:
+    """Write one file, reporting failure instead of raising"""
+    path, contents = file
+    try:
+        path.write_bytes(contents)
+        return True
+    except OSError:
+        return False
+
+
+def _index_figure_files(output_dir: Path) -> Dict[Tuple[str, str], str]:
+    """
+    Map (page number, figure index) to figure filename with a single directory scan
+
+    Args:
+        output_dir: Directory containing figure images
+
+    Returns:
+        Dictionary mapping (page, index) strings to the figure filename
+    """
+    index = {}
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            match = _FIG_FILE_RE.match(entry.name)
+            if match:
+                index.setdefault(match.groups(), entry.name)
+
+    return index
 
 
 def insert_figure_images(
@@ -25,8 +160,7 @@ def insert_figure_images(
     Returns:
         Markdown with embedded figure image references
     """
-    # Pattern: Figure X (Page Y, Index Z)
-    pattern = r'Figure\s+(\d+)\.?\s*\(Page\s+(\d+),\s*Index\s+(\d+)\)'
+    figure_files = _index_figure_files(output_dir)
 
     def replace_with_image(match):
         figure_num = match.group(1)
@@ -37,13 +171,9 @@ def insert_figure_images(
         original = match.group(0)
 
         # Find the actual figure file
-        # Files are named: page_{page_num}_figure_{index}.{ext}
-        figure_pattern = f"page_{page_num}_figure_{index}.*"
-        figure_files = list(output_dir.glob(figure_pattern))
+        figure_filename = figure_files.get((page_num, index))
 
-        if figure_files:
-            # Use the first matching file
-            figure_filename = figure_files[0].name
+        if figure_filename:
             # Image path relative to API (includes /api/v1 prefix)
             image_url = f"/api/v1/images/{analysis_id}/{figure_filename}"
 
@@ -54,7 +184,7 @@ def insert_figure_images(
             return original
 
     # Replace all occurrences
-    processed = re.sub(pattern, replace_with_image, markdown_content)
+    processed = _FIG_RE.sub(replace_with_image, markdown_content)
 
     return processed
 
@@ -0,0 +1,50 @@
+"""
+Rate limiting utilities
+Keeps outgoing API calls within a requests-per-minute quota
+"""
+
+import asyncio
+import time
+
+SECONDS_PER_MINUTE = 60
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket limiting calls to a requests-per-minute budget
+    Callers only wait when the budget is exhausted, never unconditionally
+    """
+
+    def __init__(self, requests_per_minute: int):
+        """
+        Initialize token bucket with a full budget
+
+        Args:
+            requests_per_minute: Sustained number of calls allowed per minute
+        """
+        if requests_per_minute < 1:
+            raise ValueError(f"requests_per_minute must be positive, got {requests_per_minute}")
+
+        self._capacity = float(requests_per_minute)
+        self._tokens = float(requests_per_minute)
+        self._refill_per_second = requests_per_minute / SECONDS_PER_MINUTE
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Take one token, sleeping only as long as needed for it to refill"""
+        async with self._lock:
+            self._refill()
+
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._refill_per_second)
+                self._refill()
+
+            self._tokens -= 1
+
+    def _refill(self) -> None:
+        """Add tokens accrued since the last refill, capped at capacity"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._refill_per_second)
+        self._last_refill = now